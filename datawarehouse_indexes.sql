@@ -0,0 +1,12 @@
+
+-- Fact table constraints, created once after the bulk load
+ALTER TABLE FactSales ADD CONSTRAINT factsales_pkey PRIMARY KEY (SalesKey);
+ALTER TABLE FactSales ADD CONSTRAINT factsales_datekey_fkey FOREIGN KEY (DateKey) REFERENCES DimDate(DateKey);
+ALTER TABLE FactSales ADD CONSTRAINT factsales_shopkey_fkey FOREIGN KEY (ShopKey) REFERENCES DimShop(ShopKey);
+ALTER TABLE FactSales ADD CONSTRAINT factsales_productkey_fkey FOREIGN KEY (ProductKey) REFERENCES DimProduct(ProductKey);
+
+-- Create indexes to improve query performance
+CREATE INDEX idx_factsales_date ON FactSales(DateKey);
+CREATE INDEX idx_factsales_shop ON FactSales(ShopKey);
+CREATE INDEX idx_factsales_product ON FactSales(ProductKey);
+CREATE INDEX idx_factsales_composite ON FactSales(DateKey, ShopKey, ProductKey);
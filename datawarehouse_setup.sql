@@ -46,24 +46,17 @@ CREATE TABLE DimProduct (
 );
 
 -- Sales Fact Table
+-- Primary key, foreign keys and indexes are created by datawarehouse_indexes.sql
+-- after the bulk load, so rows are not indexed one by one while loading
 CREATE TABLE FactSales (
-    SalesKey SERIAL PRIMARY KEY,
+    SalesKey SERIAL,
     DateKey INTEGER NOT NULL,
     ShopKey INTEGER NOT NULL,
     ProductKey INTEGER NOT NULL,
     QuantitySold INTEGER NOT NULL,
-    Revenue DECIMAL(10,2) NOT NULL,
-    FOREIGN KEY (DateKey) REFERENCES DimDate(DateKey),
-    FOREIGN KEY (ShopKey) REFERENCES DimShop(ShopKey),
-    FOREIGN KEY (ProductKey) REFERENCES DimProduct(ProductKey)
+    Revenue DECIMAL(10,2) NOT NULL
 );
 
--- Create indexes to improve query performance
-CREATE INDEX idx_factsales_date ON FactSales(DateKey);
-CREATE INDEX idx_factsales_shop ON FactSales(ShopKey);
-CREATE INDEX idx_factsales_product ON FactSales(ProductKey);
-CREATE INDEX idx_factsales_composite ON FactSales(DateKey, ShopKey, ProductKey);
-
 -- Create analytical view
 CREATE VIEW v_sales_summary AS
 SELECT 
@@ -2,9 +2,16 @@
 # -*- coding: utf-8 -*-
 
 import psycopg2
-import csv
-from datetime import datetime
+from psycopg2.extras import execute_values
+import pandas as pd
 import sys
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def _read_sql_file(filename):
+    """Read SQL script, cached so repeated ETL runs skip the file I/O"""
+    with open(filename, 'r', encoding='utf-8') as file:
+        return file.read()
 
 class DataWarehouseETL:
     def __init__(self, 
@@ -31,6 +38,9 @@ class DataWarehouseETL:
                 user=self.user,
                 password=self.password
             )
+            # Keep explicit transactions: dimensions and facts are committed as one load,
+            # constraints and indexes in a separate step afterwards
+            self.conn.autocommit = False
             self.cursor = self.conn.cursor()
             print("✅ Successfully connected to PostgreSQL database")
         except Exception as e:
@@ -50,13 +60,12 @@ class DataWarehouseETL:
     def execute_sql_file(self, filename):
         """Execute SQL file"""
         try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                sql_script = file.read()
-                
-                # PostgreSQL supports direct multi-statement execution
-                self.cursor.execute(sql_script)
-                self.conn.commit()
-                
+            sql_script = _read_sql_file(filename)
+            
+            # PostgreSQL supports direct multi-statement execution
+            self.cursor.execute(sql_script)
+            self.conn.commit()
+            
         except Exception as e:
             print(f"Error executing SQL file {filename}: {e}")
             self.conn.rollback()
@@ -65,48 +74,40 @@ class DataWarehouseETL:
         """Populate date dimension table"""
         print("Populating date dimension table...")
         
-        dates_data = []
-        for year in range(start_year, end_year + 1):
-            for month in range(1, 13):
-                for day in range(1, 32):
-                    try:
-                        date_obj = datetime(year, month, day)
-                        date_key = int(date_obj.strftime("%Y%m%d"))
-                        quarter = (month - 1) // 3 + 1
-                        month_names = ['', 'January', 'February', 'March', 'April', 'May', 'June',
-                                     'July', 'August', 'September', 'October', 'November', 'December']
-                        
-                        dates_data.append((
-                            date_key,
-                            date_obj.strftime("%Y-%m-%d"),
-                            year,
-                            quarter,
-                            month,
-                            day,
-                            date_obj.weekday() + 1,
-                            month_names[month],
-                            f"Q{quarter}"
-                        ))
-                    except ValueError:
-                        continue
+        # Only valid calendar days, derived columns computed on the whole range
+        dates = pd.date_range(f'{start_year}-01-01', f'{end_year}-12-31', freq='D')
+        quarters = (dates.month - 1) // 3 + 1
+        
+        dates_data = list(zip(
+            (dates.year * 10000 + dates.month * 100 + dates.day).tolist(),
+            dates.strftime("%Y-%m-%d").tolist(),
+            dates.year.tolist(),
+            quarters.tolist(),
+            dates.month.tolist(),
+            dates.day.tolist(),
+            (dates.dayofweek + 1).tolist(),
+            dates.month_name().tolist(),
+            ('Q' + quarters.astype(str)).tolist()
+        ))
         
-       
         query = '''
             INSERT INTO DimDate 
             (DateKey, FullDate, Year, Quarter, Month, Day, DayOfWeek, MonthName, QuarterName)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES %s
             ON CONFLICT (DateKey) DO NOTHING
         '''
         
-        self.cursor.executemany(query, dates_data)
-        self.conn.commit()
+        execute_values(self.cursor, query, dates_data, page_size=1000)
         print(f"✅ Inserted {len(dates_data)} date records")
         
     def populate_dim_shop(self):
         """Populate shop dimension table"""
         print("Populating shop dimension table...")
         
+        # Copy the geographic hierarchy server-side, no rows travel through the client
         query = '''
+        INSERT INTO DimShop 
+        (ShopID, ShopName, CityID, CityName, RegionID, RegionName, CountryID, CountryName)
         SELECT DISTINCT 
             s.ShopID,
             s.Name as ShopName,
@@ -123,24 +124,17 @@ class DataWarehouseETL:
         '''
         
         self.cursor.execute(query)
-        shops = self.cursor.fetchall()
-        
-        # Insert shop dimension data
-        insert_query = '''
-            INSERT INTO DimShop 
-            (ShopID, ShopName, CityID, CityName, RegionID, RegionName, CountryID, CountryName)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        '''
-        
-        self.cursor.executemany(insert_query, shops)
-        self.conn.commit()
-        print(f"✅ Inserted {len(shops)} shop records")
+        print(f"✅ Inserted {self.cursor.rowcount} shop records")
         
     def populate_dim_product(self):
         """Populate product dimension table"""
         print("Populating product dimension table...")
         
+        # Copy the product hierarchy server-side, no rows travel through the client
         query = '''
+        INSERT INTO DimProduct 
+        (ArticleID, ArticleName, Price, ProductGroupID, ProductGroupName, 
+         ProductFamilyID, ProductFamilyName, ProductCategoryID, ProductCategoryName)
         SELECT DISTINCT
             a.ArticleID,
             a.Name as ArticleName,
@@ -158,102 +152,65 @@ class DataWarehouseETL:
         '''
         
         self.cursor.execute(query)
-        products = self.cursor.fetchall()
-        
-        # Insert product dimension data
-        insert_query = '''
-            INSERT INTO DimProduct 
-            (ArticleID, ArticleName, Price, ProductGroupID, ProductGroupName, 
-             ProductFamilyID, ProductFamilyName, ProductCategoryID, ProductCategoryName)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        '''
-        
-        self.cursor.executemany(insert_query, products)
-        self.conn.commit()
-        print(f"✅ Inserted {len(products)} product records")
+        print(f"✅ Inserted {self.cursor.rowcount} product records")
         
     def load_sales_data(self):
         """Load sales data to fact table"""
         print("Loading sales data to fact table...")
         
-        # Create lookup dictionaries for better performance
-        shop_lookup = {}
-        product_lookup = {}
+        # Stage raw CSV lines server-side, fields are split and typed in SQL below
+        self.cursor.execute("CREATE TEMP TABLE stg_sales (line TEXT) ON COMMIT DROP")
         
-        # Build shop lookup dictionary
-        self.cursor.execute("SELECT ShopKey, ShopName FROM DimShop")
-        shops = self.cursor.fetchall()
-        for shop_key, shop_name in shops:
-            shop_lookup[shop_name] = shop_key
-            
-        # Build product lookup dictionary
-        self.cursor.execute("SELECT ProductKey, ArticleName FROM DimProduct")
-        products = self.cursor.fetchall()
-        for product_key, article_name in products:
-            product_lookup[article_name] = product_key
+        with open('ressources/sales.csv', 'rb') as file:
+            file.readline()  # Skip header
+            # Read the file in 1 MB chunks instead of psycopg2's 8 KB default.
+            # CSV with control-character delimiter/quote copies each line as-is, backslashes stay literal
+            self.cursor.copy_expert(
+                "COPY stg_sales FROM STDIN WITH (FORMAT csv, DELIMITER E'\\x01', QUOTE E'\\x02', ENCODING 'LATIN1')",
+                file,
+                size=1024 * 1024
+            )
+        staged_count = self.cursor.rowcount
+        print(f"Staged {staged_count} rows from sales.csv")
         
-        # Read sales data CSV file
-        batch_size = 1000
-        current_batch = []
-        processed_count = 0
+        # Row estimate for the planner so the key lookups below become hash joins
+        self.cursor.execute("ANALYZE stg_sales")
         
-        with open('ressources/sales.csv', 'r', encoding='iso-8859-1', errors='ignore') as file:
-            reader = csv.DictReader(file, delimiter=';')
-            
-            for row_num, row in enumerate(reader, 1):
-                try:
-                    # Parse date
-                    date_str = row['Date']
-                    date_parts = date_str.split('.')
-                    date_obj = datetime(int(date_parts[2]), int(date_parts[1]), int(date_parts[0]))
-                    date_key = int(date_obj.strftime("%Y%m%d"))
-                    
-                    # Find dimension keys
-                    shop_name = row['Shop']
-                    article_name = row['Article']
-                    
-                    if shop_name in shop_lookup and article_name in product_lookup:
-                        shop_key = shop_lookup[shop_name]
-                        product_key = product_lookup[article_name]
-                        
-                        # Process revenue data (German format)
-                        revenue_str = row['Revenue'].replace(',', '.')
-                        revenue = float(revenue_str)
-                        
-                        current_batch.append((
-                            date_key,
-                            shop_key,
-                            product_key,
-                            int(row['Sold']),
-                            revenue
-                        ))
-                        
-                        if len(current_batch) >= batch_size:
-                            self.insert_sales_batch(current_batch)
-                            processed_count += len(current_batch)
-                            current_batch = []
-                            
-                        if row_num % 10000 == 0:
-                            print(f"Processed {row_num} rows...")
-                            
-                except Exception as e:
-                    print(f"Error processing row {row_num}: {e}")
-                    continue
-            
-            # Insert last batch
-            if current_batch:
-                self.insert_sales_batch(current_batch)
-                processed_count += len(current_batch)
-                
-        print(f"✅ Sales data loading completed, processed {processed_count} valid records")
-        
-    def insert_sales_batch(self, batch_data):
-        """Batch insert sales data"""
+        # Resolve date/shop/product keys with a join inside PostgreSQL,
+        # malformed lines and unknown shops/articles are filtered out.
+        # DateKey is cut from the validated DD.MM.YYYY prefix, no date parsing; the DimDate
+        # join drops impossible or out-of-range dates (the FK is only added after the load)
         query = '''
-            INSERT INTO FactSales (DateKey, ShopKey, ProductKey, QuantitySold, Revenue)
-            VALUES (%s, %s, %s, %s, %s)
+        INSERT INTO FactSales (DateKey, ShopKey, ProductKey, QuantitySold, Revenue)
+        SELECT 
+            d.DateKey,
+            s.ShopKey,
+            p.ProductKey,
+            split_part(stg.line, ';', 4)::INTEGER,
+            replace(split_part(stg.line, ';', 5), ',', '.')::DECIMAL(10,2)
+        FROM stg_sales stg
+        JOIN DimDate d ON d.DateKey = (substr(stg.line, 7, 4) || substr(stg.line, 4, 2) || substr(stg.line, 1, 2))::INTEGER
+        JOIN DimShop s ON s.ShopName = split_part(stg.line, ';', 2)
+        JOIN DimProduct p ON p.ArticleName = split_part(stg.line, ';', 3)
+        WHERE stg.line ~ '^[0-9]{2}[.][0-9]{2}[.][0-9]{4};[^;]*;[^;]*;-?[0-9]+;-?[0-9]+(,[0-9]+)?$'
         '''
-        self.cursor.executemany(query, batch_data)
+        
+        self.cursor.execute(query)
+        processed_count = self.cursor.rowcount
+        
+        skipped_count = staged_count - processed_count
+        if skipped_count:
+            print(f"Skipped {skipped_count} rows with invalid data or unknown date/shop/article")
+        print(f"✅ Sales data loading completed, processed {processed_count} valid records")
+        
+    def build_fact_indexes(self):
+        """Create fact table constraints and indexes after the bulk load"""
+        print("Building fact table constraints and indexes...")
+        
+        # Give the one-off index builds enough memory to sort in RAM
+        self.cursor.execute("SET LOCAL maintenance_work_mem = '1GB'")
+        # Not through execute_sql_file: a failed constraint must abort the ETL, not be printed and skipped
+        self.cursor.execute(_read_sql_file('datawarehouse_indexes.sql'))
         self.conn.commit()
         
     def run_etl(self):
@@ -263,10 +220,16 @@ class DataWarehouseETL:
         try:
             self.connect()
             self.setup_database()
+            
+            # Load dimensions and facts in one transaction, skip the fsync wait on commit
+            self.cursor.execute("SET LOCAL synchronous_commit = off")
             self.populate_dim_date()
             self.populate_dim_shop()
             self.populate_dim_product()
             self.load_sales_data()
+            self.conn.commit()
+            
+            self.build_fact_indexes()
             
             print("✅ ETL process completed!")
             self.print_summary()
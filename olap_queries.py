@@ -7,7 +7,67 @@ Provides multidimensional data analysis with dynamic granularity control
 
 import psycopg2
 import pandas as pd
+import numpy as np
 import sys
+import io
+import contextlib
+
+# Column types of the CUBE / GROUPING SETS results, so read_csv skips type inference.
+# Dimension labels are low-cardinality, categoricals compare and group on integer codes
+_RESULT_DTYPES = {
+    'geo_dimension': 'category',
+    'time_dimension': 'category',
+    'product_dimension': 'category',
+    'grouping_mask': 'uint8',
+    'total_quantity': 'int64',
+    'total_revenue': 'float64',
+    'transaction_count': 'int64'
+}
+
+# GROUPING(geo, time, product) bit masks, a set bit means that dimension is rolled up
+DETAIL_MASK = 0b000
+GEO_TOTAL_MASK = 0b011
+GRAND_TOTAL_MASK = 0b111
+
+# Display labels indexed by grouping_mask
+_ANALYSIS_LEVELS = np.array([
+    'Detail Level',        # 000
+    'By Geo + Time',       # 001
+    'By Geo + Product',    # 010
+    'By Geography Only',   # 011
+    'By Time + Product',   # 100
+    'By Time Only',        # 101
+    'By Product Only',     # 110
+    'Grand Total'          # 111
+], dtype=object)
+
+_CROSS_TABLE_TYPES = np.array([
+    'Detail',              # 000
+    'Row Subtotal',        # 001
+    'Column Subtotal',     # 010
+    'Geographic Total',    # 011
+    'Other', 'Other', 'Other',
+    'Grand Total'          # 111
+], dtype=object)
+
+# Technical columns kept in results but not printed
+_HIDDEN_COLUMNS = frozenset(('grouping_mask',))
+
+# Rows printed by print_dataframe for large frames when stdout is not a terminal
+_PREVIEW_ROWS = 50
+
+# Hierarchy levels walked by interactive_drill_navigation, most aggregated first
+_GEO_LEVELS = ('country', 'region', 'city', 'shop')
+_TIME_LEVELS = ('year', 'quarter', 'month', 'day')
+_PRODUCT_LEVELS = ('productCategory', 'productFamily', 'productGroup', 'article')
+
+# Ready-to-write navigation messages (newline included), indexed by the level reached
+_DRILL_MSG_GEO = tuple(f"🔽 Drilling down Geographic dimension to {lvl}\n" for lvl in _GEO_LEVELS)
+_DRILL_MSG_TIME = tuple(f"🔽 Drilling down Time dimension to {lvl}\n" for lvl in _TIME_LEVELS)
+_DRILL_MSG_PRODUCT = tuple(f"🔽 Drilling down Product dimension to {lvl}\n" for lvl in _PRODUCT_LEVELS)
+_ROLLUP_MSG_GEO = tuple(f"🔼 Rolling up Geographic dimension to {lvl}\n" for lvl in _GEO_LEVELS)
+_ROLLUP_MSG_TIME = tuple(f"🔼 Rolling up Time dimension to {lvl}\n" for lvl in _TIME_LEVELS)
+_ROLLUP_MSG_PRODUCT = tuple(f"🔼 Rolling up Product dimension to {lvl}\n" for lvl in _PRODUCT_LEVELS)
 
 class OLAPAnalyzer:
     def __init__(self, 
@@ -23,28 +83,44 @@ class OLAPAnalyzer:
         self.password = password
         self.conn = None
         
-        # Define dimension hierarchies and corresponding SQL fields
+        # Define dimension hierarchies and corresponding base cube fields
         self.geo_hierarchy = {
-            'country': 's.CountryName',
-            'region': 's.RegionName', 
-            'city': 's.CityName',
-            'shop': 's.ShopName'
+            'country': 'b.CountryName',
+            'region': 'b.RegionName', 
+            'city': 'b.CityName',
+            'shop': 'b.ShopName'
         }
         
         self.time_hierarchy = {
-            'year': 'd.Year',
-            'quarter': 'd.Quarter',
-            'month': 'd.Month', 
-            'day': 'd.Day'
+            'year': 'b.Year',
+            'quarter': 'b.Quarter',
+            'month': 'b.Month', 
+            'day': 'b.Day'
         }
         
         self.product_hierarchy = {
-            'productCategory': 'p.ProductCategoryName',
-            'productFamily': 'p.ProductFamilyName',
-            'productGroup': 'p.ProductGroupName',
-            'article': 'p.ArticleName'
+            'productCategory': 'b.ProductCategoryName',
+            'productFamily': 'b.ProductFamilyName',
+            'productGroup': 'b.ProductGroupName',
+            'article': 'b.ArticleName'
+        }
+        
+        # SQL for every granularity combination, built once:
+        # (geo, time, product, query kind, year filter) -> query text
+        self._sql = {
+            (geo, time, product, kind, year_filter): self._build_cube_sql(
+                geo_field, time_field, product_field, kind, year_filter)
+            for geo, geo_field in self.geo_hierarchy.items()
+            for time, time_field in self.time_hierarchy.items()
+            for product, product_field in self.product_hierarchy.items()
+            for kind in ('analysis', 'cross_table')
+            for year_filter in (False, True)
         }
         
+        # Query results keyed by (geo, time, product, year, query kind)
+        self._cube_cache = {}
+        self._base_cube_ready = False
+        
     def connect(self):
         """Connect to PostgreSQL database"""
         try:
@@ -55,6 +131,7 @@ class OLAPAnalyzer:
                 user=self.user,
                 password=self.password
             )
+            self._base_cube_ready = False
             print("✅ Successfully connected to PostgreSQL database")
         except Exception as e:
             print(f"❌ Database connection failed: {e}")
@@ -66,14 +143,126 @@ class OLAPAnalyzer:
             self.connect()
             
         try:
-            if params:
-                return pd.read_sql_query(query, self.conn, params=params)
-            else:
-                return pd.read_sql_query(query, self.conn)
+            # Stream the result as CSV and parse it in C instead of building Python row tuples.
+            # COPY takes no bind parameters, so they are substituted client-side first
+            buffer = io.StringIO()
+            with self.conn.cursor() as cursor:
+                if params:
+                    query = cursor.mogrify(query, params).decode()
+                cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+            buffer.seek(0)
+            return pd.read_csv(buffer, dtype=_RESULT_DTYPES, keep_default_na=False, na_values=[''], engine='c')
         except Exception as e:
             print(f"Query execution failed: {e}")
             return pd.DataFrame()
     
+    @staticmethod
+    def _build_cube_sql(geo_field, time_field, product_field, kind, year_filter):
+        """Build the CUBE ('analysis') or GROUPING SETS ('cross_table') query over the base cube"""
+        query = f"""
+        SELECT 
+            COALESCE(CAST({geo_field} AS TEXT), '[Total]') as geo_dimension,
+            COALESCE(CAST({time_field} AS TEXT), '[Total]') as time_dimension,
+            COALESCE(CAST({product_field} AS TEXT), '[Total]') as product_dimension,
+            GROUPING({geo_field}, {time_field}, {product_field}) as grouping_mask,
+            COALESCE(SUM(b.total_quantity), 0)::BIGINT as total_quantity,
+            SUM(b.total_revenue) as total_revenue,
+            COALESCE(SUM(b.transaction_count), 0)::BIGINT as transaction_count
+        FROM mv_sales_base b
+        """
+        
+        if year_filter:
+            query += " WHERE b.Year = %s"
+            
+        if kind == 'analysis':
+            query += f"""
+        GROUP BY CUBE({geo_field}, {time_field}, {product_field})"""
+        else:
+            query += f"""
+        GROUP BY GROUPING SETS (
+            ({geo_field}, {time_field}, {product_field}),  -- Detail level
+            ({geo_field}, {time_field}),                   -- Row subtotals (geo + time)
+            ({geo_field}, {product_field}),                -- Column subtotals (geo + product)
+            ({geo_field}),                                 -- Geographic totals
+            ()                                             -- Grand total
+        )"""
+        # No ORDER BY, rows are sorted on the client (see _finish_cube_result)
+        return query
+    
+    def _ensure_base_cube(self):
+        """
+        Make sure the mv_sales_base materialized view exists, building it on first use
+        
+        The view holds the fact table at its finest grain (shop × day × article) with all
+        hierarchy columns denormalized next to the pre-aggregated measures, so every
+        CUBE / GROUPING SETS query rolls up from it instead of re-joining FactSales
+        with the three dimension tables. It persists across sessions; the ETL drops it
+        together with FactSales (DROP ... CASCADE), so the next session rebuilds it.
+        Returns False (after rolling back) when the view cannot be built.
+        """
+        if self._base_cube_ready:
+            return True
+        if not self.conn:
+            self.connect()
+            
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('mv_sales_base') IS NOT NULL")
+                if not cursor.fetchone()[0]:
+                    print("Building mv_sales_base materialized view...")
+                    cursor.execute("""
+                    CREATE MATERIALIZED VIEW IF NOT EXISTS mv_sales_base AS
+                    SELECT 
+                        s.CountryName, s.RegionName, s.CityName, s.ShopName,
+                        d.Year, d.Quarter, d.Month, d.Day,
+                        p.ProductCategoryName, p.ProductFamilyName, p.ProductGroupName, p.ArticleName,
+                        SUM(f.QuantitySold) as total_quantity,
+                        SUM(f.Revenue) as total_revenue,
+                        COUNT(*) as transaction_count
+                    FROM FactSales f
+                    JOIN DimShop s ON f.ShopKey = s.ShopKey
+                    JOIN DimDate d ON f.DateKey = d.DateKey
+                    JOIN DimProduct p ON f.ProductKey = p.ProductKey
+                    GROUP BY s.ShopKey, d.DateKey, p.ProductKey
+                    """)
+                    cursor.execute("ANALYZE mv_sales_base")
+                # Year filter is a plain predicate on the view, index it for multi-year warehouses.
+                # Also for views built by an earlier session, the statement is a no-op once it exists
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_mv_sales_base_year ON mv_sales_base (Year)")
+            self.conn.commit()
+        except Exception as e:
+            # Leave the connection usable for the following queries
+            print(f"Building mv_sales_base failed: {e}")
+            self.conn.rollback()
+            return False
+        self._base_cube_ready = True
+        return True
+    
+    @staticmethod
+    def _finish_cube_result(result_df, label_column=None, labels=None):
+        """Sort a raw CUBE / GROUPING SETS result and add the client-side derived columns"""
+        # Aggregation level first, then dimension labels (categorical codes). read_csv sorts the
+        # categories by code point, so labels are in bytewise order, not the database collation
+        # the former ORDER BY used (en_US puts 'AEG Öko-Lavamat' before 'AEG Öko Lavatherm')
+        result_df = result_df.sort_values(
+            ['grouping_mask', 'geo_dimension', 'time_dimension', 'product_dimension'], ignore_index=True)
+        # Weighted average unit price from the summed measures, no per-row division in SQL
+        result_df.insert(result_df.columns.get_loc('transaction_count') + 1, 'avg_unit_price',
+                         result_df['total_revenue'] / result_df['total_quantity'].replace(0, np.nan))
+        if label_column:
+            # Label each row by table lookup on its grouping mask
+            result_df[label_column] = pd.Categorical(labels[result_df['grouping_mask'].to_numpy()])
+        return result_df
+    
+    def _cached_query(self, key, query, params=None, label_column=None, labels=None):
+        """Execute query once per key, later calls get a copy of the cached result"""
+        if key not in self._cube_cache:
+            result_df = self.execute_query(query, params)
+            if result_df.empty:
+                return result_df
+            self._cube_cache[key] = self._finish_cube_result(result_df, label_column, labels)
+        return self._cube_cache[key].copy()
+    
     def analysis(self, geo='region', time='quarter', product='productGroup', year=None):
         """
         Universal OLAP analysis function with dynamic granularity control
@@ -85,6 +274,7 @@ class OLAPAnalyzer:
         - year: Optional year filter
         
         Returns: DataFrame with multidimensional analysis results
+        (avg_unit_price is weighted by quantity: total_revenue / total_quantity)
         """
         
         # Validate parameters
@@ -95,54 +285,14 @@ class OLAPAnalyzer:
         if product not in self.product_hierarchy:
             raise ValueError(f"Invalid product parameter. Must be one of: {list(self.product_hierarchy.keys())}")
         
-        # Build SQL query with dynamic granularity
-        geo_field = self.geo_hierarchy[geo]
-        time_field = self.time_hierarchy[time]
-        product_field = self.product_hierarchy[product]
-        
-        query = f"""
-        SELECT 
-            COALESCE(CAST({geo_field} AS TEXT), '[Total]') as geo_dimension,
-            COALESCE(CAST({time_field} AS TEXT), '[Total]') as time_dimension,
-            COALESCE(CAST({product_field} AS TEXT), '[Total]') as product_dimension,
-            GROUPING({geo_field}) as geo_grouping,
-            GROUPING({time_field}) as time_grouping,
-            GROUPING({product_field}) as product_grouping,
-            SUM(f.QuantitySold) as total_quantity,
-            SUM(f.Revenue) as total_revenue,
-            COUNT(*) as transaction_count,
-            AVG(f.Revenue / NULLIF(f.QuantitySold, 0)) as avg_unit_price,
-            CASE 
-                WHEN GROUPING({geo_field}) = 0 AND GROUPING({time_field}) = 0 AND GROUPING({product_field}) = 0 THEN 'Detail Level'
-                WHEN GROUPING({geo_field}) = 0 AND GROUPING({time_field}) = 0 AND GROUPING({product_field}) = 1 THEN 'By Geo + Time'
-                WHEN GROUPING({geo_field}) = 0 AND GROUPING({time_field}) = 1 AND GROUPING({product_field}) = 0 THEN 'By Geo + Product'
-                WHEN GROUPING({geo_field}) = 1 AND GROUPING({time_field}) = 0 AND GROUPING({product_field}) = 0 THEN 'By Time + Product'
-                WHEN GROUPING({geo_field}) = 0 AND GROUPING({time_field}) = 1 AND GROUPING({product_field}) = 1 THEN 'By Geography Only'
-                WHEN GROUPING({geo_field}) = 1 AND GROUPING({time_field}) = 0 AND GROUPING({product_field}) = 1 THEN 'By Time Only'
-                WHEN GROUPING({geo_field}) = 1 AND GROUPING({time_field}) = 1 AND GROUPING({product_field}) = 0 THEN 'By Product Only'
-                WHEN GROUPING({geo_field}) = 1 AND GROUPING({time_field}) = 1 AND GROUPING({product_field}) = 1 THEN 'Grand Total'
-                ELSE 'Unknown Level'
-            END as aggregation_level
-        FROM FactSales f
-        JOIN DimShop s ON f.ShopKey = s.ShopKey
-        JOIN DimDate d ON f.DateKey = d.DateKey
-        JOIN DimProduct p ON f.ProductKey = p.ProductKey
-        """
+        if not self._ensure_base_cube():
+            return pd.DataFrame()
         
-        params = []
-        if year:
-            query += " WHERE d.Year = %s"
-            params.append(year)
-            
-        query += f"""
-        GROUP BY CUBE({geo_field}, {time_field}, {product_field})
-        ORDER BY GROUPING({geo_field}), GROUPING({time_field}), GROUPING({product_field}),
-                 COALESCE(CAST({geo_field} AS TEXT), 'ZZZZ'), 
-                 COALESCE(CAST({time_field} AS TEXT), 'ZZZZ'), 
-                 COALESCE(CAST({product_field} AS TEXT), 'ZZZZ')
-        """
+        query = self._sql[(geo, time, product, 'analysis', bool(year))]
+        params = [year] if year else None
         
-        result_df = self.execute_query(query, params if params else None)
+        result_df = self._cached_query((geo, time, product, year, 'analysis'), query, params,
+                                       'aggregation_level', _ANALYSIS_LEVELS)
         
         if not result_df.empty:
             # Add metadata about the analysis
@@ -161,6 +311,49 @@ class OLAPAnalyzer:
             
         return result_df
     
+    def prefetch_adjacent(self, geo, time, product, year=None):
+        """
+        Load the analysis for the current levels and every one-level drill down/roll up in one round-trip
+        
+        The CUBE queries are combined with UNION ALL and tagged with a source column; each
+        slice is stored in the query cache, so the next navigation step is served from memory.
+        """
+        combinations = [(geo, time, product)]
+        for position, hierarchy in enumerate((self.geo_hierarchy, self.time_hierarchy, self.product_hierarchy)):
+            levels = list(hierarchy)
+            level_index = levels.index(combinations[0][position])
+            for step in (1, -1):
+                if 0 <= level_index + step < len(levels):
+                    neighbour = list(combinations[0])
+                    neighbour[position] = levels[level_index + step]
+                    combinations.append(tuple(neighbour))
+        
+        pending = [combo for combo in combinations if (*combo, year, 'analysis') not in self._cube_cache]
+        if not pending:
+            return
+            
+        if not self._ensure_base_cube():
+            return
+        
+        query = "\nUNION ALL\n".join(
+            f"SELECT {source} as source, q.* FROM ({self._sql[(*combo, 'analysis', bool(year))]}) q"
+            for source, combo in enumerate(pending)
+        )
+        params = [year] * len(pending) if year else None
+        
+        result_df = self.execute_query(query, params)
+        if result_df.empty:
+            return
+            
+        for source, combo in enumerate(pending):
+            part = result_df[result_df['source'] == source].drop(columns='source').reset_index(drop=True)
+            if not part.empty:
+                # Categories were inferred over all slices, keep only this slice's labels
+                for column in ('geo_dimension', 'time_dimension', 'product_dimension'):
+                    part[column] = part[column].cat.remove_unused_categories()
+                self._cube_cache[(*combo, year, 'analysis')] = self._finish_cube_result(
+                    part, 'aggregation_level', _ANALYSIS_LEVELS)
+    
     def generate_cross_table(self, geo='region', time='quarter', product='productGroup', year=2019, metric='total_quantity'):
         """
         Generate cross table 
@@ -185,174 +378,75 @@ class OLAPAnalyzer:
         
         try:
             # Extract detail level data for pivot table generation
-            detail_data = data[data['aggregation_type'] == 'Detail'].copy()
+            detail_data = data[data['grouping_mask'] == DETAIL_MASK].copy()
             
             if detail_data.empty:
                 print("No detail data available for pivot table")
                 return data
             
-            # Create pivot table with multi-level rows and complete aggregations
+            # Detail cells: (geo, time) rows × product columns, plus a row total
             pivot_table = detail_data.pivot_table(
                 index=['geo_dimension', 'time_dimension'],
                 columns='product_dimension', 
                 values=metric,
                 fill_value=0,
                 aggfunc='sum',
-                margins=True,  # Adds automatic totals
-                margins_name='TOTAL'
+                observed=True
             )
+            pivot_table['TOTAL'] = pivot_table.sum(axis=1)
             
-            # Fix NaN issue in TOTAL column by manually calculating row totals
-            if 'TOTAL' in pivot_table.columns:
-                # For each row, calculate the sum of all product columns (excluding TOTAL)
-                product_cols = [col for col in pivot_table.columns if col != 'TOTAL']
-                pivot_table['TOTAL'] = pivot_table[product_cols].sum(axis=1)
+            # Regional subtotals and grand total as vectorized sums over the detail cells
+            region_totals = pivot_table.groupby(level='geo_dimension', observed=True).sum()
+            region_totals.index = pd.MultiIndex.from_arrays(
+                [region_totals.index.astype(str), ['total'] * len(region_totals)]
+            )
+            grand_total_row = pivot_table.sum().to_frame().T
+            grand_total_row.index = pd.MultiIndex.from_tuples([('total', '')])
             
-            # Fix NaN issue in TOTAL row by manually calculating column totals
-            if 'TOTAL' in pivot_table.index.get_level_values(0):
-                # For each column, calculate the sum of all non-total rows
-                for col in pivot_table.columns:
-                    # Get all non-total rows
-                    non_total_mask = pivot_table.index.get_level_values(0) != 'TOTAL'
-                    if non_total_mask.any():
-                        total_value = pivot_table.loc[non_total_mask, col].sum()
-                        # Set the total value for this column
-                        pivot_table.loc[('TOTAL', 'TOTAL'), col] = total_value
+            # Label time periods, then place each region's subtotal right after its rows
+            pivot_table.index = pd.MultiIndex.from_arrays([
+                pivot_table.index.get_level_values(0).astype(str),
+                f"{time} " + pivot_table.index.get_level_values(1).astype(str) + f", {year}"
+            ])
+            result_df = pd.concat([pivot_table, region_totals])
+            order = np.argsort(result_df.index.get_level_values(0).to_numpy(), kind='stable')
+            result_df = pd.concat([result_df.iloc[order], grand_total_row])
+            result_df.index.names = ['geo_region', 'time_period']
+            result_df.columns.name = None
             
             # Display options for better readability
             max_cols = 8
-            display_table = pivot_table.copy()
             
-            if len(pivot_table.columns) - 1 > max_cols:  # -1 for TOTAL column
+            if len(result_df.columns) - 1 > max_cols:  # -1 for TOTAL column
                 # Keep first few columns, add ..., then TOTAL
-                cols_to_keep = list(pivot_table.columns[:max_cols]) + ['TOTAL']
-                display_table = pivot_table[cols_to_keep].copy()
-                # Insert ... column before TOTAL - fix the position calculation
-                insert_position = len(display_table.columns) - 1
-                display_table.insert(insert_position, '...', '...')
+                cols_to_keep = list(result_df.columns[:max_cols]) + ['TOTAL']
+                result_df = result_df[cols_to_keep].copy()
+                result_df.insert(max_cols, '...', '...')
             
-            # Format the multi-level index for better display
-            enhanced_rows = []
-            
-            # Process each geographic region
-            geo_regions = [idx for idx in display_table.index.get_level_values(0).unique() if idx != 'TOTAL']
+            # Format display, options apply to this table only
+            print(f"\n📋 Cross Table:")
+            with pd.option_context('display.max_columns', None, 'display.width', None, 'display.max_colwidth', 12):
+                print(result_df.to_string())
             
-            for geo_region in geo_regions:
-                try:
-                    region_rows = display_table.loc[geo_region]
-                    
-                    # Handle single row case (when only one time period)
-                    if len(region_rows.shape) == 1:
-                        time_periods = [region_rows.name]
-                        region_rows = pd.DataFrame([region_rows])
-                        region_rows.index = time_periods
-                    else:
-                        time_periods = region_rows.index
-                    
-                    # Add individual time period rows
-                    region_total = None
-                    for time_period in time_periods:
-                        if time_period != 'TOTAL':
-                            row_data = region_rows.loc[time_period] if len(region_rows.shape) > 1 else region_rows.iloc[0]
-                            row_dict = row_data.to_dict()
-                            
-                            # Calculate TOTAL column manually if it's NaN
-                            if 'TOTAL' in row_dict and (pd.isna(row_dict['TOTAL']) or row_dict['TOTAL'] is None):
-                                total_sum = 0
-                                for col, value in row_dict.items():
-                                    if col != 'TOTAL' and isinstance(value, (int, float)) and not pd.isna(value):
-                                        total_sum += value
-                                row_dict['TOTAL'] = total_sum
-                            
-                            enhanced_rows.append({
-                                'geo_region': geo_region,
-                                'time_period': f"{time} {time_period}, {year}",
-                                **row_dict
-                            })
-                        else:
-                            # Store the regional total for later use
-                            region_total = region_rows.loc[time_period] if len(region_rows.shape) > 1 else region_rows.iloc[0]
-                    
-                    # Add regional subtotal - calculate manually to ensure TOTAL column is correct
-                    region_data_only = [row for row in enhanced_rows if row['geo_region'] == geo_region and 'total' not in row['time_period']]
-                    if region_data_only:
-                        # Sum up all the values for this region
-                        subtotal_dict = {'geo_region': geo_region, 'time_period': 'total'}
-                        total_sum = 0
-                        for col in display_table.columns:
-                            if col != 'TOTAL':
-                                col_sum = sum(row.get(col, 0) for row in region_data_only if isinstance(row.get(col), (int, float)))
-                                subtotal_dict[col] = col_sum
-                                total_sum += col_sum
-                        # Add the TOTAL column with the correct sum
-                        subtotal_dict['TOTAL'] = total_sum
-                        enhanced_rows.append(subtotal_dict)
-                    
-                except Exception as e:
-                    print(f"Warning: Could not process region {geo_region}: {e}")
-                    continue
+            # Show basic summary
+            print(f"\n📊 Table Summary:")
+            print(f"  Geographic regions: {len(region_totals)}")
+            print(f"  Time periods: {len(detail_data['time_dimension'].unique())}")
+            print(f"  Product categories: {len(pivot_table.columns) - 1}")  # -1 for TOTAL column
+            print(f"  Total table size: {len(result_df)} rows × {len(result_df.columns)} columns")
             
-            # Add grand total row
-            if 'TOTAL' in display_table.index:
-                try:
-                    grand_total_data = display_table.loc['TOTAL']
-                    if hasattr(grand_total_data, 'loc'):
-                        grand_total_data = grand_total_data.loc['TOTAL'] if 'TOTAL' in grand_total_data.index else grand_total_data.iloc[0]
-                    
-                    grand_total_dict = grand_total_data.to_dict()
-                    
-                    # Calculate TOTAL column manually if it's NaN
-                    if 'TOTAL' in grand_total_dict and (pd.isna(grand_total_dict['TOTAL']) or grand_total_dict['TOTAL'] is None):
-                        total_sum = 0
-                        for col, value in grand_total_dict.items():
-                            if col != 'TOTAL' and isinstance(value, (int, float)) and not pd.isna(value):
-                                total_sum += value
-                        grand_total_dict['TOTAL'] = total_sum
-                    
-                    enhanced_rows.append({
-                        'geo_region': 'total',
-                        'time_period': '',
-                        **grand_total_dict
-                    })
-                except Exception as e:
-                    print(f"Warning: Could not add grand total: {e}")
+            # Show additional insights from GROUPING SETS aggregations
+            print(f"\n🔍 Additional Insights from GROUPING SETS:")
+            geographic_totals = data[data['grouping_mask'] == GEO_TOTAL_MASK]
+            if not geographic_totals.empty:
+                print(f"  Geographic Totals:")
+                for _, row in geographic_totals.head(3).iterrows():
+                    print(f"    {row['geo_dimension']}: {row[metric]:,.0f}")
             
-            # Convert to DataFrame
-            if enhanced_rows:
-                result_df = pd.DataFrame(enhanced_rows)
-                result_df = result_df.set_index(['geo_region', 'time_period'])
-                
-                # Format display
-                pd.set_option('display.max_columns', None)
-                pd.set_option('display.width', None)
-                pd.set_option('display.max_colwidth', 12)
-                
-                print(f"\n📋 Cross Table:")
-                print(result_df.to_string())
-                
-                # Show basic summary
-                print(f"\n📊 Table Summary:")
-                print(f"  Geographic regions: {len(geo_regions)}")
-                print(f"  Time periods: {len(detail_data['time_dimension'].unique())}")
-                print(f"  Product categories: {len(pivot_table.columns) - 1}")  # -1 for TOTAL column
-                print(f"  Total table size: {len(result_df)} rows × {len(result_df.columns)} columns")
-                
-                # Show additional insights from GROUPING SETS aggregations
-                print(f"\n🔍 Additional Insights from GROUPING SETS:")
-                geographic_totals = data[data['aggregation_type'] == 'Geographic Total']
-                if not geographic_totals.empty:
-                    print(f"  Geographic Totals:")
-                    for _, row in geographic_totals.head(3).iterrows():
-                        print(f"    {row['geo_dimension']}: {row[metric]:,.0f}")
-                
-                grand_total = data[data['aggregation_type'] == 'Grand Total']
-                if not grand_total.empty:
-                    total_value = grand_total.iloc[0][metric]
-                    print(f"  Grand Total {metric}: {total_value:,.0f}")
-                
-            else:
-                print("No enhanced data to display")
-                return display_table
+            grand_total = data[data['grouping_mask'] == GRAND_TOTAL_MASK]
+            if not grand_total.empty:
+                total_value = grand_total.iloc[0][metric]
+                print(f"  Grand Total {metric}: {total_value:,.0f}")
                 
         except Exception as e:
             print(f"Error creating cross table: {e}")
@@ -360,7 +454,7 @@ class OLAPAnalyzer:
             traceback.print_exc()
             # Fallback to simple display 
             print("\nFallback - Raw Data Sample:")
-            fallback_data = data[data['aggregation_type'] == 'Detail'] if 'aggregation_type' in data.columns else data
+            fallback_data = data[data['grouping_mask'] == DETAIL_MASK] if 'grouping_mask' in data.columns else data
             if not fallback_data.empty:
                 print(fallback_data[['geo_dimension', 'time_dimension', 'product_dimension', metric]].head(10).to_string(index=False))
             else:
@@ -374,38 +468,31 @@ class OLAPAnalyzer:
         if not self.conn:
             self.connect()
             
-        queries = {
-            'total_revenue': "SELECT SUM(Revenue) FROM FactSales",
-            'total_transactions': "SELECT COUNT(*) FROM FactSales",
-            'date_range': """
-                SELECT MIN(d.FullDate) as StartDate, MAX(d.FullDate) as EndDate 
-                FROM FactSales f JOIN DimDate d ON f.DateKey = d.DateKey
-            """,
-            'unique_products': "SELECT COUNT(DISTINCT ProductKey) FROM FactSales",
-            'unique_shops': "SELECT COUNT(DISTINCT ShopKey) FROM FactSales"
-        }
+        # All figures in one scan and one round-trip
+        query = """
+            SELECT 
+                SUM(f.Revenue) as total_revenue,
+                COUNT(*) as total_transactions,
+                MIN(d.FullDate) as start_date,
+                MAX(d.FullDate) as end_date,
+                COUNT(DISTINCT f.ProductKey) as unique_products,
+                COUNT(DISTINCT f.ShopKey) as unique_shops
+            FROM FactSales f
+            LEFT JOIN DimDate d ON f.DateKey = d.DateKey
+        """
         
-        results = {}
-        for key, query in queries.items():
-            try:
-                result = self.execute_query(query)
-                if not result.empty:
-                    if key == 'date_range':
-                        start_date = result.iloc[0, 0]
-                        end_date = result.iloc[0, 1]
-                        results[key] = f"{start_date} to {end_date}"
-                    else:
-                        results[key] = result.iloc[0, 0]
-                else:
-                    results[key] = None
-            except Exception as e:
-                print(f"Error querying {key}: {e}")
-                results[key] = None
+        results = dict.fromkeys(['total_revenue', 'total_transactions', 'date_range', 'unique_products', 'unique_shops'])
+        result = self.execute_query(query)
+        if not result.empty:
+            for key in ('total_revenue', 'total_transactions', 'unique_products', 'unique_shops'):
+                results[key] = result.at[0, key]
+            results['date_range'] = f"{result.at[0, 'start_date']} to {result.at[0, 'end_date']}"
                 
         return results
     
     def close(self):
         """Close database connection"""
+        self._cube_cache.clear()
         if self.conn:
             self.conn.close()
 
@@ -430,57 +517,14 @@ class OLAPAnalyzer:
         if product not in self.product_hierarchy:
             raise ValueError(f"Invalid product parameter. Must be one of: {list(self.product_hierarchy.keys())}")
         
-        # Build SQL query with GROUPING SETS for cross table aggregation
-        geo_field = self.geo_hierarchy[geo]
-        time_field = self.time_hierarchy[time]
-        product_field = self.product_hierarchy[product]
+        if not self._ensure_base_cube():
+            return pd.DataFrame()
         
-        query = f"""
-        SELECT 
-            COALESCE(CAST({geo_field} AS TEXT), '[Total]') as geo_dimension,
-            COALESCE(CAST({time_field} AS TEXT), '[Total]') as time_dimension,
-            COALESCE(CAST({product_field} AS TEXT), '[Total]') as product_dimension,
-            GROUPING({geo_field}) as geo_grouping,
-            GROUPING({time_field}) as time_grouping,
-            GROUPING({product_field}) as product_grouping,
-            SUM(f.QuantitySold) as total_quantity,
-            SUM(f.Revenue) as total_revenue,
-            COUNT(*) as transaction_count,
-            AVG(f.Revenue / NULLIF(f.QuantitySold, 0)) as avg_unit_price,
-            CASE 
-                WHEN GROUPING({geo_field}) = 0 AND GROUPING({time_field}) = 0 AND GROUPING({product_field}) = 0 THEN 'Detail'
-                WHEN GROUPING({geo_field}) = 0 AND GROUPING({time_field}) = 0 AND GROUPING({product_field}) = 1 THEN 'Row Subtotal'
-                WHEN GROUPING({geo_field}) = 0 AND GROUPING({time_field}) = 1 AND GROUPING({product_field}) = 0 THEN 'Column Subtotal'
-                WHEN GROUPING({geo_field}) = 0 AND GROUPING({time_field}) = 1 AND GROUPING({product_field}) = 1 THEN 'Geographic Total'
-                WHEN GROUPING({geo_field}) = 1 AND GROUPING({time_field}) = 1 AND GROUPING({product_field}) = 1 THEN 'Grand Total'
-                ELSE 'Other'
-            END as aggregation_type
-        FROM FactSales f
-        JOIN DimShop s ON f.ShopKey = s.ShopKey
-        JOIN DimDate d ON f.DateKey = d.DateKey
-        JOIN DimProduct p ON f.ProductKey = p.ProductKey
-        """
+        query = self._sql[(geo, time, product, 'cross_table', bool(year))]
+        params = [year] if year else None
         
-        params = []
-        if year:
-            query += " WHERE d.Year = %s"
-            params.append(year)
-            
-        query += f"""
-        GROUP BY GROUPING SETS (
-            ({geo_field}, {time_field}, {product_field}),  -- Detail level
-            ({geo_field}, {time_field}),                   -- Row subtotals (geo + time)
-            ({geo_field}, {product_field}),                -- Column subtotals (geo + product)
-            ({geo_field}),                                 -- Geographic totals
-            ()                                             -- Grand total
-        )
-        ORDER BY GROUPING({geo_field}), GROUPING({time_field}), GROUPING({product_field}),
-                 COALESCE(CAST({geo_field} AS TEXT), 'ZZZZ'), 
-                 COALESCE(CAST({time_field} AS TEXT), 'ZZZZ'), 
-                 COALESCE(CAST({product_field} AS TEXT), 'ZZZZ')
-        """
-        
-        result_df = self.execute_query(query, params if params else None)
+        result_df = self._cached_query((geo, time, product, year, 'cross_table'), query, params,
+                                       'aggregation_type', _CROSS_TABLE_TYPES)
         
         if not result_df.empty:
             print(f"📊 Cross Table Data Generated using GROUPING SETS")
@@ -493,12 +537,49 @@ class OLAPAnalyzer:
         
         return result_df
 
-    def interactive_drill_navigation(self, year=2019):
+    def _show_navigation_position(self, state):
+        """Print the navigation position and the summary of its analysis, returns the current levels"""
+        geo, time, product = state.levels()
+        
+        # Display current position in hierarchies
+        _emit(f"\n📍 Current Navigation Position:",
+              f"   Geographic: {geo} (Level {state.current_geo + 1}/4)",
+              f"   Time: {time} (Level {state.current_time + 1}/4)",
+              f"   Product: {product} (Level {state.current_product + 1}/4)")
+        
+        print(f"\n📊 Current Analysis: {geo} × {time} × {product} ({state.year})")
+        
+        # Execute analysis with current hierarchy levels
+        if state.dirty:
+            result = self.analysis(geo=geo, time=time, product=product, year=state.year)
+            state.result = result
+            # Detail rows are selected once per result, option 7 reuses them
+            detail_data = result[result['grouping_mask'] == DETAIL_MASK] if not result.empty else result
+            state.detail_data = detail_data
+            state.detail_count = detail_data.shape[0]
+            state.dirty = False
+            state.prefetched = False
+        
+        # Show summary of current level, an empty result has no detail rows either
+        if state.detail_count:
+            detail_data = state.detail_data
+            total_revenue = detail_data['total_revenue'].sum()
+            # Show top 10 records as sample
+            sample_data = detail_data.head(10)[['geo_dimension', 'time_dimension', 'product_dimension', 'total_revenue']]
+            _emit(f"📈 Summary: {state.detail_count} records, Total Revenue: €{total_revenue:,.2f}",
+                  "\n📋 Sample Data (Top 10 records):",
+                  sample_data.to_string(index=False))
+        
+        return geo, time, product
+    
+    def interactive_drill_navigation(self, year=2019, script=None):
         """
         Interactive drill down/roll up navigation through dimension hierarchies
         
         Parameters:
         - year: Year filter for analysis
+        - script: Optional string of navigation choices (e.g. "125"), replayed without
+          prompting; intermediate output is suppressed and only the final position is shown
         
         Demonstrates true OLAP navigation capabilities
         """
@@ -506,145 +587,235 @@ class OLAPAnalyzer:
         print("=" * 60)
         print("Navigate through dimension hierarchies using drill down/roll up operations")
         
-        # Define hierarchy levels for each dimension
-        geo_hierarchy_levels = ['country', 'region', 'city', 'shop']
-        time_hierarchy_levels = ['year', 'quarter', 'month', 'day']  
-        product_hierarchy_levels = ['productCategory', 'productFamily', 'productGroup', 'article']
+        # Current navigation state, starts at region × quarter × productGroup
+        state = _NavState(year)
         
-        # Current navigation state
-        current_geo = 1  # Start at country level (index 1 = region)
-        current_time = 1  # Start at quarter level  
-        current_product = 2  # Start at productGroup level
+        if script is not None:
+            # Replay mode: only the levels move, the final position is analysed once
+            with contextlib.redirect_stdout(io.StringIO()):
+                for nav_choice in script:
+                    if _NAV_HANDLERS.get(nav_choice, _nav_invalid)(state):
+                        break
+            self._show_navigation_position(state)
+            return
         
         while True:
-            # Display current position in hierarchies
-            print(f"\n📍 Current Navigation Position:")
-            print(f"   Geographic: {geo_hierarchy_levels[current_geo]} (Level {current_geo + 1}/4)")
-            print(f"   Time: {time_hierarchy_levels[current_time]} (Level {current_time + 1}/4)")
-            print(f"   Product: {product_hierarchy_levels[current_product]} (Level {current_product + 1}/4)")
-            
-            # Get current analysis
-            geo = geo_hierarchy_levels[current_geo]
-            time = time_hierarchy_levels[current_time] 
-            product = product_hierarchy_levels[current_product]
-            
-            print(f"\n📊 Current Analysis: {geo} × {time} × {product} ({year})")
-            
-            # Execute analysis with current hierarchy levels
-            result = self.analysis(geo=geo, time=time, product=product, year=year)
+            geo, time, product = self._show_navigation_position(state)
             
-            if not result.empty:
-                # Show summary of current level
-                detail_data = result[result['aggregation_level'] == 'Detail Level']
-                if not detail_data.empty:
-                    total_revenue = detail_data['total_revenue'].sum()
-                    record_count = len(detail_data)
-                    print(f"📈 Summary: {record_count} records, Total Revenue: €{total_revenue:,.2f}")
-                    
-                    # Show top 10 records as sample
-                    print("\n📋 Sample Data (Top 10 records):")
-                    sample_data = detail_data.head(10)[['geo_dimension', 'time_dimension', 'product_dimension', 'total_revenue']]
-                    print(sample_data.to_string(index=False))
-            
-            # Navigation menu
-            print(f"\n🧭 Navigation Options:")
-            print("=" * 40)
+            # Navigation menu, collected and written in one go
+            menu = [f"\n🧭 Navigation Options:", "=" * 40]
             
             # Drill Down options
-            print("🔽 DRILL DOWN (Go to more detailed level):")
-            if current_geo < len(geo_hierarchy_levels) - 1:
-                next_geo = geo_hierarchy_levels[current_geo + 1]
-                print(f"   1. Geographic: {geo_hierarchy_levels[current_geo]} → {next_geo}")
+            menu.append("🔽 DRILL DOWN (Go to more detailed level):")
+            if state.current_geo < len(_GEO_LEVELS) - 1:
+                menu.append(f"   1. Geographic: {geo} → {_GEO_LEVELS[state.current_geo + 1]}")
             else:
-                print(f"   1. Geographic: Already at most detailed level ({geo_hierarchy_levels[current_geo]})")
+                menu.append(f"   1. Geographic: Already at most detailed level ({geo})")
                 
-            if current_time < len(time_hierarchy_levels) - 1:
-                next_time = time_hierarchy_levels[current_time + 1]
-                print(f"   2. Time: {time_hierarchy_levels[current_time]} → {next_time}")
+            if state.current_time < len(_TIME_LEVELS) - 1:
+                menu.append(f"   2. Time: {time} → {_TIME_LEVELS[state.current_time + 1]}")
             else:
-                print(f"   2. Time: Already at most detailed level ({time_hierarchy_levels[current_time]})")
+                menu.append(f"   2. Time: Already at most detailed level ({time})")
                 
-            if current_product < len(product_hierarchy_levels) - 1:
-                next_product = product_hierarchy_levels[current_product + 1]
-                print(f"   3. Product: {product_hierarchy_levels[current_product]} → {next_product}")
+            if state.current_product < len(_PRODUCT_LEVELS) - 1:
+                menu.append(f"   3. Product: {product} → {_PRODUCT_LEVELS[state.current_product + 1]}")
             else:
-                print(f"   3. Product: Already at most detailed level ({product_hierarchy_levels[current_product]})")
+                menu.append(f"   3. Product: Already at most detailed level ({product})")
             
             # Roll Up options  
-            print("\n🔼 ROLL UP (Go to more aggregated level):")
-            if current_geo > 0:
-                prev_geo = geo_hierarchy_levels[current_geo - 1]
-                print(f"   4. Geographic: {geo_hierarchy_levels[current_geo]} → {prev_geo}")
+            menu.append("\n🔼 ROLL UP (Go to more aggregated level):")
+            if state.current_geo > 0:
+                menu.append(f"   4. Geographic: {geo} → {_GEO_LEVELS[state.current_geo - 1]}")
             else:
-                print(f"   4. Geographic: Already at most aggregated level ({geo_hierarchy_levels[current_geo]})")
+                menu.append(f"   4. Geographic: Already at most aggregated level ({geo})")
                 
-            if current_time > 0:
-                prev_time = time_hierarchy_levels[current_time - 1]
-                print(f"   5. Time: {time_hierarchy_levels[current_time]} → {prev_time}")
+            if state.current_time > 0:
+                menu.append(f"   5. Time: {time} → {_TIME_LEVELS[state.current_time - 1]}")
             else:
-                print(f"   5. Time: Already at most aggregated level ({time_hierarchy_levels[current_time]})")
+                menu.append(f"   5. Time: Already at most aggregated level ({time})")
                 
-            if current_product > 0:
-                prev_product = product_hierarchy_levels[current_product - 1]
-                print(f"   6. Product: {product_hierarchy_levels[current_product]} → {prev_product}")
+            if state.current_product > 0:
+                menu.append(f"   6. Product: {product} → {_PRODUCT_LEVELS[state.current_product - 1]}")
             else:
-                print(f"   6. Product: Already at most aggregated level ({product_hierarchy_levels[current_product]})")
+                menu.append(f"   6. Product: Already at most aggregated level ({product})")
             
-            print(f"\n   7. Show Detailed Data")
-            print(f"   8. Return to Main Menu")
+            menu.append(f"\n   7. Show Detailed Data")
+            menu.append(f"   8. Return to Main Menu")
+            _emit(*menu)
             
-            # Get user choice
-            nav_choice = input("\nSelect navigation option (1-8): ").strip()
+            # Get user choice, handlers return True to leave the navigation.
+            # The prompt is written first, so neighbouring levels load while the user picks an option
+            sys.stdout.write("\nSelect navigation option (1-8): ")
+            sys.stdout.flush()
+            if not state.prefetched:
+                self.prefetch_adjacent(geo, time, product, year)
+                state.prefetched = True
+            nav_choice = input().strip()
             
-            if nav_choice == '1' and current_geo < len(geo_hierarchy_levels) - 1:
-                current_geo += 1
-                print(f"🔽 Drilling down Geographic dimension to {geo_hierarchy_levels[current_geo]}")
-            elif nav_choice == '2' and current_time < len(time_hierarchy_levels) - 1:
-                current_time += 1
-                print(f"🔽 Drilling down Time dimension to {time_hierarchy_levels[current_time]}")
-            elif nav_choice == '3' and current_product < len(product_hierarchy_levels) - 1:
-                current_product += 1
-                print(f"🔽 Drilling down Product dimension to {product_hierarchy_levels[current_product]}")
-            elif nav_choice == '4' and current_geo > 0:
-                current_geo -= 1
-                print(f"🔼 Rolling up Geographic dimension to {geo_hierarchy_levels[current_geo]}")
-            elif nav_choice == '5' and current_time > 0:
-                current_time -= 1
-                print(f"🔼 Rolling up Time dimension to {time_hierarchy_levels[current_time]}")
-            elif nav_choice == '6' and current_product > 0:
-                current_product -= 1
-                print(f"🔼 Rolling up Product dimension to {product_hierarchy_levels[current_product]}")
-            elif nav_choice == '7':
-                # Show detailed data
-                if not result.empty:
-                    detail_data = result[result['aggregation_level'] == 'Detail Level']
-                    if not detail_data.empty:
-                        print_dataframe(detail_data, f"Detailed Analysis: {geo} × {time} × {product} ({year})")
-                    else:
-                        print("No detail level data available")
-            elif nav_choice == '8':
+            handler = _NAV_HANDLERS.get(nav_choice, _nav_invalid)
+            if handler(state):
                 break
-            else:
-                print("❌ Invalid choice or operation not available at current level")
-                
-def print_dataframe(df, title=""):
-    """Format and print DataFrame"""
-    print(f"\n=== {title} ===")
-    if df.empty:
-        print("No data available")
+
+class _NavState:
+    """Mutable position and cached result of interactive_drill_navigation"""
+    
+    def __init__(self, year):
+        self.year = year
+        self.current_geo = 1  # index 1 = region
+        self.current_time = 1  # quarter
+        self.current_product = 2  # productGroup
+        # Re-run the analysis only after a drill down/roll up changed the levels
+        self.dirty = True
+        self.result = None
+        self.detail_data = None
+        self.detail_count = 0
+        self.prefetched = False
+        # Rendered detail views keyed by levels, analysis results for the same levels don't change
+        self.rendered = {}
+    
+    def levels(self):
+        """Current (geo, time, product) level names"""
+        return (_GEO_LEVELS[self.current_geo],
+                _TIME_LEVELS[self.current_time],
+                _PRODUCT_LEVELS[self.current_product])
+
+def _nav_move(attr, step, levels, messages):
+    """Build a handler moving one dimension a level down (step 1) or up (step -1)"""
+    def handler(state):
+        level = getattr(state, attr) + step
+        if 0 <= level < len(levels):
+            setattr(state, attr, level)
+            state.dirty = True
+            sys.stdout.write(messages[level])
+        else:
+            _nav_invalid(state)
+    return handler
+
+def _nav_show_detail(state):
+    """Print the detail rows of the current analysis"""
+    if state.detail_count:
+        key = state.levels()
+        text = state.rendered.get(key)
+        if text is None:
+            geo, time, product = key
+            text = _render_dataframe(state.detail_data, f"Detailed Analysis: {geo} × {time} × {product} ({state.year})",
+                                     state.detail_count)
+            state.rendered[key] = text
+        sys.stdout.write(text)
+    elif state.result is not None and not state.result.empty:
+        print("No detail level data available")
+
+def _nav_exit(state):
+    return True
+
+def _nav_invalid(state):
+    print("❌ Invalid choice or operation not available at current level")
+
+# Navigation menu choices of interactive_drill_navigation
+_NAV_HANDLERS = {
+    '1': _nav_move('current_geo', 1, _GEO_LEVELS, _DRILL_MSG_GEO),
+    '2': _nav_move('current_time', 1, _TIME_LEVELS, _DRILL_MSG_TIME),
+    '3': _nav_move('current_product', 1, _PRODUCT_LEVELS, _DRILL_MSG_PRODUCT),
+    '4': _nav_move('current_geo', -1, _GEO_LEVELS, _ROLLUP_MSG_GEO),
+    '5': _nav_move('current_time', -1, _TIME_LEVELS, _ROLLUP_MSG_TIME),
+    '6': _nav_move('current_product', -1, _PRODUCT_LEVELS, _ROLLUP_MSG_PRODUCT),
+    '7': _nav_show_detail,
+    '8': _nav_exit
+}
+
+def _emit(*lines):
+    """Write several output lines with a single stdout write"""
+    sys.stdout.write('\n'.join(lines) + '\n')
+
+def _string_decimals(finite):
+    """Fewest decimals (at least one) that keep every value exact to 6 places, from '%.6f' text"""
+    text = np.char.mod('%.6f', finite)
+    trailing = np.char.str_len(text) - np.char.str_len(np.char.rstrip(text, '0'))
+    return 6 - min(int(trailing.min()), 5)
+
+def _format_column(values):
+    """
+    Format one column as strings the way DataFrame.to_string(index=False) does
+    
+    Returns None for what the fast path does not model (scientific notation, non-finite
+    floats, non-string objects, other dtypes), the caller then leaves the table to pandas.
+    """
+    if values.dtype.kind == 'f':
+        nan = np.isnan(values)
+        finite = values[~nan]
+        abs_vals = np.abs(finite)
+        # pandas switches to scientific notation for nonzero values below 10**-precision
+        if not np.isfinite(finite).all() or ((abs_vals < 1e-6) & (abs_vals > 0)).any():
+            return None
+        # Fixed point with the fewest decimals (at least one) that keep every value exact to 6 places
+        decimals = 6
+        if finite.size and abs_vals.max() < 1e9:
+            # Decimal digits checked on the values scaled to millionths, integer math instead of a '%.6f' pass.
+            # Values near a rounding half, where rint and '%.6f' could disagree, still go through the string pass
+            scaled = finite * 1e6
+            micro = np.rint(scaled)
+            near_half = np.abs(scaled - micro) > 0.25
+            micro = micro[~near_half].astype(np.int64)
+            decimals = next((d for d in range(1, 6) if not (micro % 10 ** (6 - d)).any()), 6)
+            if near_half.any():
+                decimals = max(decimals, _string_decimals(finite[near_half]))
+        elif finite.size:
+            decimals = _string_decimals(finite)
+        text = np.where(nan, 'NaN', np.char.mod(f'%.{decimals}f', values))
+        # ... and for values above 1e6 once they print wider than precision + 6 characters
+        if finite.size and abs_vals.max() > 1e6 and int(np.char.str_len(text).max()) > 12:
+            return None
+        return text
+    if values.dtype.kind in 'iu':
+        return np.char.mod('%d', values)
+    if values.dtype.kind == 'O' and pd.api.types.infer_dtype(values, skipna=False) == 'string':
+        return values.astype(str)
+    return None
+
+def _format_table(df, columns=None):
+    """
+    Render a result frame as a right-aligned fixed-width table, same text as to_string(index=False)
+    
+    Columns the fast path does not model, or a non-default display.precision, fall back to to_string.
+    """
+    columns = list(df.columns if columns is None else columns)
+    if pd.get_option('display.precision') != 6:
+        return df.to_string(index=False, columns=columns)
+    rows = None
+    for name in columns:
+        values = df[name].to_numpy()
+        text = _format_column(values)
+        if text is None:
+            return df.to_string(index=False, columns=columns)
+        # Numeric headers keep the sign position, as in to_string
+        header = f" {name}" if values.dtype.kind in 'fiu' else str(name)
+        width = max(len(header), int(np.char.str_len(text).max()))
+        column = np.concatenate(([header.rjust(width)], np.char.rjust(text, width)))
+        rows = column if rows is None else np.char.add(np.char.add(rows, ' '), column)
+    return '\n'.join(rows.tolist())
+
+def _render_dataframe(df, title="", n=None):
+    """Render the print_dataframe output of df as one string"""
+    # Row count taken once, callers that already know it pass it in
+    n = df.shape[0] if n is None else n
+    lines = [f"\n=== {title} ==="]
+    if n == 0:
+        lines.append("No data available")
     else:
-        # Create a display copy of the dataframe
-        display_df = df.copy()
-        
-        # Hide technical columns from display but keep them for functionality
-        columns_to_hide = ['geo_grouping', 'time_grouping', 'product_grouping']
-        columns_to_show = [col for col in display_df.columns if col not in columns_to_hide]
-        display_df = display_df[columns_to_show]
-        
-        pd.set_option('display.max_columns', None)
-        pd.set_option('display.width', None)
-        pd.set_option('display.max_colwidth', 30)
-        print(display_df.to_string(index=False))
-        print(f"Total {len(display_df)} records")
+        # Hide technical columns from display but keep them for functionality,
+        # the formatter reads the visible columns straight from df, no projected frame is built
+        columns = [col for col in df.columns if col not in _HIDDEN_COLUMNS]
+        
+        # Redirected output (logs, batch runs) gets a preview of large frames instead of every row
+        max_rows = pd.get_option('display.max_rows')
+        if not sys.stdout.isatty() and max_rows and n > max_rows:
+            lines.append(_format_table(df.head(_PREVIEW_ROWS), columns))
+            lines.append(f"... ({n - _PREVIEW_ROWS} more rows)")
+        else:
+            lines.append(_format_table(df, columns))
+        lines.append(f"Total {n} records")
+    return '\n'.join(lines) + '\n'
 
- 
\ No newline at end of file
+def print_dataframe(df, title="", n=None):
+    """Format and print DataFrame, n is the row count when the caller already has it"""
+    sys.stdout.write(_render_dataframe(df, title, n))